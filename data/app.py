@@ -2,9 +2,11 @@
 # INTERACTIVE DASHBOARD APP FOR CAR INSURANCE CLAIM DATA
 # =====================================================
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from dash import Dash, html, dcc, Input, Output
+import plotly.graph_objects as go
+from dash import Dash, html, dcc, Input, Output, State, Patch
 import dash_bootstrap_components as dbc
 import logging
 import os
@@ -25,7 +27,7 @@ logging.basicConfig(
 # LOAD CLEANED DATA
 # -----------------------------------------------------
 try:
-    df = pd.read_csv("cleaned_data.csv")
+    df = pd.read_parquet("cleaned_data.parquet")
     logging.info("✅ Cleaned dataset loaded successfully. Shape: %s", df.shape)
 except Exception as e:
     logging.error(f"❌ Failed to load cleaned data: {e}")
@@ -47,24 +49,58 @@ if "claim_status" in df.columns:
 
 # Create numeric helper column for aggregations
 if "claim_status" in df.columns:
-    df["claim_flag"] = df["claim_status"].astype(str).str.lower().map({"claim": 1, "no claim": 0})
-    # if any unmapped values, coerce to NaN then fill with 0 for safety in dashboards (optional)
-    df["claim_flag"] = pd.to_numeric(df["claim_flag"], errors="coerce")
+    # data_cleaning.py already lower-cases claim_status, so one vectorised comparison
+    # is enough; anything other than 'claim' (incl. missing) counts as no claim.
+    df["claim_flag"] = np.where(df["claim_status"].to_numpy() == "claim", np.int8(1), np.int8(0))
     logging.info("Created 'claim_flag' numeric column for aggregations (1 = claim, 0 = no claim)")
 else:
     logging.error("Column 'claim_status' not found after loading. Aborting.")
     raise SystemExit("Column 'claim_status' not found in dataset.")
 
+# -----------------------------------------------------
+# CATEGORICAL DTYPES FOR FILTER / GROUPING COLUMNS
+# -----------------------------------------------------
+# Low-cardinality text columns are stored as category codes so isin / groupby
+# compare small integers instead of hashing Python strings on every callback.
+CATEGORICAL_COLUMNS = ["age", "gender", "driving_experience", "vehicle_year", "vehicle_ownership", "claim_status"]
+
+for col in CATEGORICAL_COLUMNS:
+    df[col] = df[col].astype("category")
+logging.info("Converted %s to categorical dtype", CATEGORICAL_COLUMNS)
+
+# -----------------------------------------------------
+# PRE-AGGREGATED CLAIM CUBE (sums & counts per filter combination)
+# -----------------------------------------------------
+# Every bar chart is a claim rate over a low-cardinality column, so we
+# aggregate once here and let callbacks re-aggregate this small frame
+# instead of grouping the raw rows on every filter change.
+CUBE_DIMENSIONS = ["age", "gender", "driving_experience", "vehicle_year", "vehicle_ownership"]
+
+cube = (
+    df.groupby(CUBE_DIMENSIONS, dropna=False, observed=True)["claim_flag"]
+    .agg(["sum", "count"])
+    .reset_index()
+)
+logging.info("Built claim cube with %d rows from %d records", len(cube), len(df))
+
+# Segments shown as facets of the claim-rate chart (column -> facet title)
+SEGMENT_DIMENSIONS = {
+    "age": "Age",
+    "gender": "Gender",
+    "driving_experience": "Driving Experience",
+    "vehicle_ownership": "Vehicle Ownership",
+    "vehicle_year": "Vehicle Year"
+}
+
 # -----------------------------------------------------
 # INITIAL METRIC CALCULATION FUNCTION (uses claim_flag)
 # -----------------------------------------------------
 def calculate_metrics(data: pd.DataFrame):
     total_customers = len(data)
-    total_claims = int(data["claim_flag"].fillna(0).sum())
-    # If there are rows with NaN claim_flag, we exclude them from the mean
-    claim_rate = round(data["claim_flag"].dropna().mean() * 100, 2) if not data["claim_flag"].dropna().empty else 0.0
-    avg_credit_score = round(data["credit_score"].mean(), 2) if "credit_score" in data.columns else None
-    avg_mileage = round(data["annual_mileage"].mean(), 2) if "annual_mileage" in data.columns else None
+    total_claims = int(data["claim_flag"].sum())
+    claim_rate = round(data["claim_flag"].mean() * 100, 2) if total_customers else 0.0
+    avg_credit_score = round(float(data["credit_score"].mean()), 2) if "credit_score" in data.columns else None
+    avg_mileage = round(float(data["annual_mileage"].mean()), 2) if "annual_mileage" in data.columns else None
 
     return {
         "total_customers": total_customers,
@@ -77,18 +113,94 @@ def calculate_metrics(data: pd.DataFrame):
 # -----------------------------------------------------
 # KPI CARD FUNCTION
 # -----------------------------------------------------
-def create_kpi_card(title, value, color="primary"):
+# Cards are built once in the layout; callbacks only update the value's children.
+def create_kpi_card(title, value_id, color="primary"):
     return dbc.Card([
         dbc.CardHeader(title),
-        dbc.CardBody(html.H4(value, className=f"text-{color}"))
+        dbc.CardBody(html.H4(id=value_id, className=f"text-{color}"))
     ], className="mb-2")
 
+# -----------------------------------------------------
+# FILTER FUNCTION (works on raw rows and on the claim cube)
+# -----------------------------------------------------
+def apply_filters(data: pd.DataFrame, selected_age, selected_gender, selected_experience, selected_year):
+    # Combine every active filter into one boolean mask so the frame is sliced once
+    masks = []
+    if selected_age:
+        masks.append(data["age"].isin(selected_age).to_numpy())
+    if selected_gender:
+        masks.append(data["gender"].isin(selected_gender).to_numpy())
+    if selected_experience:
+        masks.append(data["driving_experience"].isin(selected_experience).to_numpy())
+    if selected_year:
+        masks.append(data["vehicle_year"].isin(selected_year).to_numpy())
+
+    if not masks:
+        return data
+    return data.loc[np.logical_and.reduce(masks)]
+
+# -----------------------------------------------------
+# CLAIM RATE HELPER (re-aggregates the claim cube)
+# -----------------------------------------------------
+def rate_by(data: pd.DataFrame, col):
+    # sort=False / observed=True skip the sort and empty categories; sum / count
+    # avoids the generic mean path.
+    grouped = data.groupby(col, sort=False, observed=True, dropna=False)[["sum", "count"]].sum()
+    return pd.DataFrame({
+        "category": grouped.index.astype(str),
+        "claim_rate": grouped["sum"].to_numpy() / grouped["count"].to_numpy() * 100
+    })
+
+# -----------------------------------------------------
+# SPEEDING BOX STATISTICS
+# -----------------------------------------------------
+BOX_KEYS = ["x", "y", "q1", "median", "q3", "lowerfence", "upperfence", "mean"]
+
+def speeding_box_values(data: pd.DataFrame):
+    # Quartiles, Tukey fences (1.5 x IQR) and the distinct outlier values per
+    # claim status, so only a few numbers per box are serialized instead of every
+    # filtered row. Every status keeps an entry (empty when filtered out) so trace
+    # positions stay fixed for Patch updates.
+    grouped = data.groupby("claim_status", observed=True)["speeding_violations"]
+    samples = {status: group.to_numpy() for status, group in grouped}
+    values = {}
+    for status in data["claim_status"].cat.categories:
+        speeding = samples.get(status)
+        if speeding is None or speeding.size == 0:
+            values[status] = {key: [] for key in BOX_KEYS}
+            continue
+        q1, median, q3 = np.percentile(speeding, [25, 50, 75])
+        iqr = q3 - q1
+        inside = (speeding >= q1 - 1.5 * iqr) & (speeding <= q3 + 1.5 * iqr)
+        outliers = np.unique(speeding[~inside])
+        values[status] = {
+            "x": [status],
+            # Plotly draws sample points beyond the fences as outliers; an empty
+            # sample list would hide the box, so it is sent as None instead
+            "y": [outliers.tolist()] if outliers.size else None,
+            "q1": [float(q1)],
+            "median": [float(median)],
+            "q3": [float(q3)],
+            "lowerfence": [float(speeding[inside].min())],
+            "upperfence": [float(speeding[inside].max())],
+            "mean": [float(speeding.mean())]
+        }
+    return values
+
 # -----------------------------------------------------
 # CREATE DASH APP
 # -----------------------------------------------------
 app = Dash(__name__, external_stylesheets=[dbc.themes.FLATLY])
 app.title = "Car Insurance Claim Dashboard"
 
+# -----------------------------------------------------
+# DROPDOWN OPTIONS (read once from the categorical categories)
+# -----------------------------------------------------
+AGE_OPTIONS = [{"label": a, "value": a} for a in df["age"].cat.categories]
+GENDER_OPTIONS = [{"label": g, "value": g} for g in df["gender"].cat.categories]
+EXPERIENCE_OPTIONS = [{"label": e, "value": e} for e in df["driving_experience"].cat.categories]
+YEAR_OPTIONS = [{"label": v, "value": v} for v in df["vehicle_year"].cat.categories]
+
 # -----------------------------------------------------
 # APP LAYOUT
 # -----------------------------------------------------
@@ -100,7 +212,7 @@ app.layout = dbc.Container([
         dbc.Col([
             html.Label("Filter by Age"),
             dcc.Dropdown(
-                options=[{"label": a, "value": a} for a in sorted(df["age"].dropna().unique())],
+                options=AGE_OPTIONS,
                 id="filter-age",
                 multi=True,
                 placeholder="Select age group(s)"
@@ -110,7 +222,7 @@ app.layout = dbc.Container([
         dbc.Col([
             html.Label("Filter by Gender"),
             dcc.Dropdown(
-                options=[{"label": g, "value": g} for g in sorted(df["gender"].dropna().unique())],
+                options=GENDER_OPTIONS,
                 id="filter-gender",
                 multi=True,
                 placeholder="Select gender(s)"
@@ -120,7 +232,7 @@ app.layout = dbc.Container([
         dbc.Col([
             html.Label("Filter by Driving Experience"),
             dcc.Dropdown(
-                options=[{"label": e, "value": e} for e in sorted(df["driving_experience"].dropna().unique())],
+                options=EXPERIENCE_OPTIONS,
                 id="filter-experience",
                 multi=True,
                 placeholder="Select experience level(s)"
@@ -130,7 +242,7 @@ app.layout = dbc.Container([
         dbc.Col([
             html.Label("Filter by Vehicle Year"),
             dcc.Dropdown(
-                options=[{"label": v, "value": v} for v in sorted(df["vehicle_year"].dropna().unique())],
+                options=YEAR_OPTIONS,
                 id="filter-year",
                 multi=True,
                 placeholder="Select vehicle year(s)"
@@ -138,39 +250,55 @@ app.layout = dbc.Container([
         ], width=3),
     ], className="mb-4"),
 
-    # ---------------- KPI CARDS ----------------
-    dbc.Row(id="kpi-cards", className="mb-4"),
+    # Debounced filter selections (written by the clientside callback below)
+    dcc.Store(id="filter-state"),
+    # Set once the graphs hold full figures; later updates are sent as Patches
+    dcc.Store(id="figures-initialized", data=False),
 
-    # ---------------- GRAPHS ----------------
+    # ---------------- KPI CARDS ----------------
     dbc.Row([
-        dbc.Col(dcc.Graph(id="claims-by-age"), width=6),
-        dbc.Col(dcc.Graph(id="claims-by-gender"), width=6)
+        dbc.Col(create_kpi_card("Total Customers", "kpi-customers", "primary"), width=2),
+        dbc.Col(create_kpi_card("Total Claims", "kpi-claims", "danger"), width=2),
+        dbc.Col(create_kpi_card("Claim Rate (%)", "kpi-claim-rate", "success"), width=2),
+        dbc.Col(create_kpi_card("Avg Credit Score", "kpi-credit-score", "info"), width=3),
+        dbc.Col(create_kpi_card("Avg Mileage", "kpi-mileage", "warning"), width=3)
     ], className="mb-4"),
 
+    # ---------------- GRAPHS ----------------
     dbc.Row([
-        dbc.Col(dcc.Graph(id="experience-vs-claim"), width=6),
-        dbc.Col(dcc.Graph(id="ownership-vs-claim"), width=6)
+        dbc.Col(dcc.Graph(id="claim-rate-by-segment"), width=12)
     ], className="mb-4"),
 
     dbc.Row([
-        dbc.Col(dcc.Graph(id="vehicle-year-vs-claim"), width=6),
         dbc.Col(dcc.Graph(id="speeding-vs-claim"), width=6)
     ])
 ])
 
 # -----------------------------------------------------
-# CALLBACK: FILTER LOGIC & DASH UPDATES
+# CLIENTSIDE CALLBACK: DEBOUNCE FILTER CHANGES
 # -----------------------------------------------------
-@app.callback(
-    [
-        Output("kpi-cards", "children"),
-        Output("claims-by-age", "figure"),
-        Output("claims-by-gender", "figure"),
-        Output("experience-vs-claim", "figure"),
-        Output("ownership-vs-claim", "figure"),
-        Output("vehicle-year-vs-claim", "figure"),
-        Output("speeding-vs-claim", "figure")
-    ],
+# Rapid multi-select toggling would otherwise rebuild every figure per click.
+# Each change waits 250 ms in the browser and only the latest selection is
+# pushed into the store that drives the server-side callback.
+FILTER_DEBOUNCE_MS = 250
+
+app.clientside_callback(
+    """
+    function(age, gender, experience, year) {
+        const ticket = (window.filterDebounceTicket || 0) + 1;
+        window.filterDebounceTicket = ticket;
+        return new Promise(function(resolve) {
+            setTimeout(function() {
+                if (ticket !== window.filterDebounceTicket) {
+                    resolve(window.dash_clientside.no_update);
+                } else {
+                    resolve({age: age, gender: gender, experience: experience, year: year});
+                }
+            }, %d);
+        });
+    }
+    """ % FILTER_DEBOUNCE_MS,
+    Output("filter-state", "data"),
     [
         Input("filter-age", "value"),
         Input("filter-gender", "value"),
@@ -178,133 +306,96 @@ app.layout = dbc.Container([
         Input("filter-year", "value")
     ]
 )
-def update_dashboard(selected_age, selected_gender, selected_experience, selected_year):
-    try:
-        filtered_df = df.copy()
-
-        if selected_age:
-            filtered_df = filtered_df[filtered_df["age"].isin(selected_age)]
-        if selected_gender:
-            filtered_df = filtered_df[filtered_df["gender"].isin(selected_gender)]
-        if selected_experience:
-            filtered_df = filtered_df[filtered_df["driving_experience"].isin(selected_experience)]
-        if selected_year:
-            filtered_df = filtered_df[filtered_df["vehicle_year"].isin(selected_year)]
-
-        metrics = calculate_metrics(filtered_df)
-
-        # KPI cards
-        kpi_cards = dbc.Row([
-            dbc.Col(create_kpi_card("Total Customers", f"{metrics['total_customers']:,}", "primary"), width=2),
-            dbc.Col(create_kpi_card("Total Claims", f"{metrics['total_claims']:,}", "danger"), width=2),
-            dbc.Col(create_kpi_card("Claim Rate (%)", f"{metrics['claim_rate']}%", "success"), width=2),
-            dbc.Col(create_kpi_card("Avg Credit Score", f"{metrics['avg_credit_score']}", "info"), width=3),
-            dbc.Col(create_kpi_card("Avg Mileage", f"{metrics['avg_mileage']:,}", "warning"), width=3)
-        ])
-
-        # ----------------- FIGURES (use claim_flag mean -> percent) -----------------
-
-        # Age
-        age_grouped = (
-            filtered_df.groupby("age", dropna=False)["claim_flag"]
-            .mean()
-            .reset_index()
-            .rename(columns={"claim_flag": "claim_rate"})
-        )
-        age_grouped["claim_rate"] = age_grouped["claim_rate"] * 100
 
-        fig_age = px.bar(
-            age_grouped,
-            x="age", y="claim_rate",
-            title="Claim Rate by Age (%)",
-            color="age", text_auto=".2f"
-        )
-        fig_age.update_layout(yaxis_title="Claim Rate (%)")
-
-        # Gender
-        gender_grouped = (
-            filtered_df.groupby("gender", dropna=False)["claim_flag"]
-            .mean()
-            .reset_index()
-            .rename(columns={"claim_flag": "claim_rate"})
+# -----------------------------------------------------
+# CALLBACK: FILTER LOGIC & DASH UPDATES
+# -----------------------------------------------------
+@app.callback(
+    [
+        Output("kpi-customers", "children"),
+        Output("kpi-claims", "children"),
+        Output("kpi-claim-rate", "children"),
+        Output("kpi-credit-score", "children"),
+        Output("kpi-mileage", "children"),
+        Output("claim-rate-by-segment", "figure"),
+        Output("speeding-vs-claim", "figure"),
+        Output("figures-initialized", "data")
+    ],
+    Input("filter-state", "data"),
+    State("figures-initialized", "data"),
+    prevent_initial_call=True
+)
+def update_dashboard(filter_state, figures_initialized):
+    try:
+        filter_state = filter_state or {}
+        filters = (
+            filter_state.get("age"),
+            filter_state.get("gender"),
+            filter_state.get("experience"),
+            filter_state.get("year")
         )
-        gender_grouped["claim_rate"] = gender_grouped["claim_rate"] * 100
+        filtered_df = apply_filters(df, *filters)
+        filtered_cube = apply_filters(cube, *filters)
 
-        fig_gender = px.bar(
-            gender_grouped,
-            x="gender", y="claim_rate",
-            title="Claim Rate by Gender (%)",
-            color="gender", text_auto=".2f"
-        )
-        fig_gender.update_layout(yaxis_title="Claim Rate (%)")
-
-        # Driving experience
-        exp_grouped = (
-            filtered_df.groupby("driving_experience", dropna=False)["claim_flag"]
-            .mean()
-            .reset_index()
-            .rename(columns={"claim_flag": "claim_rate"})
-        )
-        exp_grouped["claim_rate"] = exp_grouped["claim_rate"] * 100
+        metrics = calculate_metrics(filtered_df)
 
-        fig_experience = px.bar(
-            exp_grouped,
-            x="driving_experience", y="claim_rate",
-            title="Driving Experience vs Claim Rate (%)",
-            color="driving_experience", text_auto=".2f"
-        )
-        fig_experience.update_layout(yaxis_title="Claim Rate (%)")
-
-        # Vehicle ownership
-        owner_grouped = (
-            filtered_df.groupby("vehicle_ownership", dropna=False)["claim_flag"]
-            .mean()
-            .reset_index()
-            .rename(columns={"claim_flag": "claim_rate"})
+        # KPI values (cards themselves live in the layout)
+        kpi_values = (
+            f"{metrics['total_customers']:,}",
+            f"{metrics['total_claims']:,}",
+            f"{metrics['claim_rate']}%",
+            f"{metrics['avg_credit_score']}",
+            f"{metrics['avg_mileage']:,}"
         )
-        owner_grouped["claim_rate"] = owner_grouped["claim_rate"] * 100
 
-        fig_ownership = px.bar(
-            owner_grouped,
-            x="vehicle_ownership", y="claim_rate",
-            title="Vehicle Ownership vs Claim Rate (%)",
-            color="vehicle_ownership", text_auto=".2f"
-        )
-        fig_ownership.update_layout(yaxis_title="Claim Rate (%)")
-
-        # Vehicle year
-        year_grouped = (
-            filtered_df.groupby("vehicle_year", dropna=False)["claim_flag"]
-            .mean()
-            .reset_index()
-            .rename(columns={"claim_flag": "claim_rate"})
-        )
-        year_grouped["claim_rate"] = year_grouped["claim_rate"] * 100
+        # ----------------- FIGURES (cube sum / count -> percent) -----------------
+        segment_rates = {label: rate_by(filtered_cube, col) for col, label in SEGMENT_DIMENSIONS.items()}
+        box_values = speeding_box_values(filtered_df)
+
+        if figures_initialized:
+            # Figures already exist in the browser: only swap the trace data so
+            # Plotly restyles the existing charts instead of rebuilding them.
+            fig_segments = Patch()
+            for i, rates in enumerate(segment_rates.values()):
+                fig_segments["data"][i]["x"] = rates["category"].tolist()
+                fig_segments["data"][i]["y"] = rates["claim_rate"].tolist()
+
+            fig_speeding = Patch()
+            for i, values in enumerate(box_values.values()):
+                for key, value in values.items():
+                    fig_speeding["data"][i][key] = value
+        else:
+            # Claim rate per segment, stacked into one long frame for a single faceted chart
+            segments_long = pd.concat(
+                [rates.assign(dimension=label) for label, rates in segment_rates.items()],
+                ignore_index=True
+            )
 
-        fig_year = px.bar(
-            year_grouped,
-            x="vehicle_year", y="claim_rate",
-            title="Vehicle Year vs Claim Rate (%)",
-            color="vehicle_year", text_auto=".2f"
-        )
-        fig_year.update_layout(yaxis_title="Claim Rate (%)")
-
-        # Speeding violations vs claim_status (categorical)
-        fig_speeding = px.box(
-            filtered_df,
-            x="claim_status", y="speeding_violations",
-            title="Speeding Violations by Claim Status",
-            color="claim_status"
-        )
+            fig_segments = px.bar(
+                segments_long,
+                x="category", y="claim_rate",
+                facet_col="dimension", facet_col_wrap=3,
+                facet_row_spacing=0.12, facet_col_spacing=0.05,
+                title="Claim Rate by Segment (%)",
+                labels={"category": "", "claim_rate": "Claim Rate (%)"},
+                color="dimension", text_auto=".2f", height=700
+            )
+            # rate_by() skips the server-side sort; let each axis order its categories
+            fig_segments.update_xaxes(matches=None, showticklabels=True, categoryorder="category ascending")
+            fig_segments.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+            fig_segments.update_layout(showlegend=False)
+
+            # Speeding violations vs claim_status (categorical)
+            fig_speeding = go.Figure([go.Box(name=status, **values) for status, values in box_values.items()])
+            fig_speeding.update_layout(
+                title="Speeding Violations by Claim Status",
+                xaxis_title="claim_status", yaxis_title="speeding_violations",
+                legend_title_text="claim_status"
+            )
 
         logging.info("✅ Dashboard updated successfully with current filter selection.")
 
-        return (
-            kpi_cards,
-            fig_age, fig_gender,
-            fig_experience, fig_ownership,
-            fig_year, fig_speeding
-        )
+        return (*kpi_values, fig_segments, fig_speeding, True)
 
     except Exception as e:
         logging.error(f"❌ Dashboard update failed: {e}")
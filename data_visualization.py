@@ -9,6 +9,7 @@ This script:
 """
 
 import pandas as pd
+import numpy as np
 import os
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -34,7 +35,7 @@ logging.info("===== STEP 3: VISUALIZATION STARTED =====")
 # 2. LOAD CLEANED DATA
 # ======================================================
 try:
-    df = pd.read_csv("cleaned_data.csv")
+    df = pd.read_parquet("cleaned_data.parquet")
     logging.info(f"Dataset loaded successfully with shape: {df.shape}")
     print(f"✅ Dataset loaded successfully: {df.shape}")
 except Exception as e:
@@ -47,144 +48,151 @@ except Exception as e:
 # ======================================================
 # Convert claim_status to numeric safely (1 = claim, 0 = no claim)
 if df["claim_status"].dtype == "object":
-    df["claim_status_num"] = df["claim_status"].apply(
-        lambda x: 1 if str(x).lower() in ["yes", "claim", "1", "true"] else 0
+    df["claim_status_num"] = (
+        df["claim_status"].astype(str).str.lower()
+        .isin(["yes", "claim", "1", "true"])
+        .astype(np.int8)
     )
 else:
     df["claim_status_num"] = df["claim_status"]
 
+claim_flags = df["claim_status_num"].to_numpy(dtype=np.float64)
+
+
+def group_claim_rate(column):
+    # Claim rate (%) per category: factorize once, then sum/count with bincount
+    # instead of a full pandas groupby for every chart.
+    codes, categories = pd.factorize(df[column], sort=True)
+    valid = codes >= 0  # factorize marks missing values as -1
+    claims = np.bincount(codes[valid], weights=claim_flags[valid], minlength=len(categories))
+    counts = np.bincount(codes[valid], minlength=len(categories))
+    return pd.DataFrame({column: categories, "claim_status_num": claims / counts * 100})
+
 # ======================================================
 # 4. STATIC VISUALIZATIONS (Matplotlib + Seaborn)
 # ======================================================
+# One figure is reused for every static chart: it is cleared (including heatmap
+# colorbars) and resized per chart instead of creating a new figure each time.
+static_fig = plt.figure()
+
+
+def reset_canvas(width, height):
+    static_fig.clf()
+    static_fig.set_size_inches(width, height)
+    return static_fig.add_subplot()
+
+
 try:
     # --- Claims by Age Group ---
-    plt.figure(figsize=(8, 5))
+    ax = reset_canvas(8, 5)
     sns.barplot(
         x="age", y="claim_status_num", data=df,
-        estimator="mean", color="skyblue"
+        estimator="mean", color="skyblue", ax=ax
     )
-    plt.title("Claims by Age Group")
-    plt.ylabel("Claim Rate (%)")
-    plt.xlabel("Age Group")
-    plt.xticks(rotation=45)
-    plt.gca().set_ylim(0, 1)
-    plt.gca().yaxis.set_major_formatter(lambda y, _: f"{y*100:.0f}%")
-    plt.tight_layout()
-    plt.savefig("outputs/visualizations/static/claims_by_age.png")
-    plt.close()
+    ax.set_title("Claims by Age Group")
+    ax.set_ylabel("Claim Rate (%)")
+    ax.set_xlabel("Age Group")
+    ax.tick_params(axis="x", rotation=45)
+    ax.set_ylim(0, 1)
+    ax.yaxis.set_major_formatter(lambda y, _: f"{y*100:.0f}%")
+    static_fig.tight_layout()
+    static_fig.savefig("outputs/visualizations/static/claims_by_age.png")
     logging.info("Saved static chart: claims_by_age.png")
 
     # --- Claims by Gender ---
-    plt.figure(figsize=(6, 4))
+    ax = reset_canvas(6, 4)
     sns.barplot(
         x="gender", y="claim_status_num", data=df,
-        estimator="mean", color="lightcoral"
+        estimator="mean", color="lightcoral", ax=ax
     )
-    plt.title("Claims by Gender")
-    plt.ylabel("Claim Rate (%)")
-    plt.xlabel("Gender")
-    plt.gca().set_ylim(0, 1)
-    plt.gca().yaxis.set_major_formatter(lambda y, _: f"{y*100:.0f}%")
-    plt.tight_layout()
-    plt.savefig("outputs/visualizations/static/claims_by_gender.png")
-    plt.close()
+    ax.set_title("Claims by Gender")
+    ax.set_ylabel("Claim Rate (%)")
+    ax.set_xlabel("Gender")
+    ax.set_ylim(0, 1)
+    ax.yaxis.set_major_formatter(lambda y, _: f"{y*100:.0f}%")
+    static_fig.tight_layout()
+    static_fig.savefig("outputs/visualizations/static/claims_by_gender.png")
     logging.info("Saved static chart: claims_by_gender.png")
 
     # --- Vehicle Ownership Distribution ---
-    plt.figure(figsize=(6, 4))
-    sns.countplot(x="vehicle_ownership", data=df, hue="vehicle_ownership", palette="pastel", legend=False)
-    plt.title("Vehicle Ownership Distribution")
-    plt.xlabel("Ownership (Owned vs Leased)")
-    plt.ylabel("Count")
-    plt.tight_layout()
-    plt.savefig("outputs/visualizations/static/vehicle_ownership.png")
-    plt.close()
+    ax = reset_canvas(6, 4)
+    sns.countplot(x="vehicle_ownership", data=df, hue="vehicle_ownership", palette="pastel", legend=False, ax=ax)
+    ax.set_title("Vehicle Ownership Distribution")
+    ax.set_xlabel("Ownership (Owned vs Leased)")
+    ax.set_ylabel("Count")
+    static_fig.tight_layout()
+    static_fig.savefig("outputs/visualizations/static/vehicle_ownership.png")
     logging.info("Saved static chart: vehicle_ownership.png")
 
     # --- Correlation Heatmap ---
-    plt.figure(figsize=(10, 8))
-    numeric_cols = df.select_dtypes(include=['number']).corr()
-    sns.heatmap(numeric_cols, annot=True, fmt=".2f", cmap="Blues")
-    plt.title("Feature Correlation Heatmap")
-    plt.tight_layout()
-    plt.savefig("outputs/visualizations/static/correlation_heatmap.png")
-    plt.close()
+    ax = reset_canvas(10, 8)
+    numeric_df = df.select_dtypes(include=['number'])
+    # Cleaned data has no missing numerics, so one np.corrcoef call on the numeric
+    # block replaces pandas' pairwise NaN-aware loop.
+    corr = np.corrcoef(numeric_df.to_numpy(dtype=np.float64), rowvar=False)
+    corr_matrix = pd.DataFrame(corr, index=numeric_df.columns, columns=numeric_df.columns)
+    sns.heatmap(corr_matrix, annot=True, fmt=".2f", cmap="Blues", ax=ax)
+    ax.set_title("Feature Correlation Heatmap")
+    static_fig.tight_layout()
+    static_fig.savefig("outputs/visualizations/static/correlation_heatmap.png")
     logging.info("Saved static chart: correlation_heatmap.png")
 
     # --- NEW: Claims by Age and Gender (Heatmap) ---
-    plt.figure(figsize=(8, 6))
+    ax = reset_canvas(8, 6)
     heatmap_data = df.pivot_table(
         values="claim_status_num",
         index="age", columns="gender", aggfunc="mean"
     )
-    sns.heatmap(heatmap_data * 100, cmap="coolwarm", annot=True, fmt=".1f")
-    plt.title("Claims by Age and Gender (%)")
-    plt.tight_layout()
-    plt.savefig("outputs/visualizations/static/claims_by_age_gender_heatmap.png")
-    plt.close()
+    sns.heatmap(heatmap_data * 100, cmap="coolwarm", annot=True, fmt=".1f", ax=ax)
+    ax.set_title("Claims by Age and Gender (%)")
+    static_fig.tight_layout()
+    static_fig.savefig("outputs/visualizations/static/claims_by_age_gender_heatmap.png")
     logging.info("Saved static chart: claims_by_age_gender_heatmap.png")
 
     print("✅ Static visualizations generated and saved.")
 except Exception as e:
     logging.error(f"Error generating static plots: {e}")
     print(f"❌ Error generating static plots: {e}")
+finally:
+    plt.close(static_fig)
 
 # ======================================================
 # 5. INTERACTIVE VISUALIZATIONS (Plotly)
 # ======================================================
 try:
-    # --- Interactive: Claims by Driving Experience ---
-    df_grouped_exp = (
-        df.groupby("driving_experience", as_index=False)["claim_status_num"]
-        .mean().sort_values("driving_experience")
+    # --- Interactive: Claims by Driving Experience, Vehicle Year & Vehicle Ownership ---
+    # One long-form frame and a single faceted px.bar instead of three figures
+    df_grouped_segments = pd.concat(
+        [
+            group_claim_rate(col).rename(columns={col: "category"}).assign(dimension=label)
+            for col, label in {
+                "driving_experience": "Driving Experience",
+                "vehicle_year": "Vehicle Year",
+                "vehicle_ownership": "Vehicle Ownership",
+            }.items()
+        ],
+        ignore_index=True
     )
-    df_grouped_exp["claim_status_num"] *= 100
     fig1 = px.bar(
-        df_grouped_exp, x="driving_experience", y="claim_status_num",
-        title="Claims by Driving Experience (%)",
+        df_grouped_segments, x="category", y="claim_status_num",
+        facet_col="dimension", facet_col_wrap=3,
+        title="Claims by Driving Experience, Vehicle Year & Vehicle Ownership (%)",
+        labels={"category": "", "claim_status_num": "Claim Rate (%)", "dimension": "Segment"},
         text_auto=".2f", color="claim_status_num", color_continuous_scale="Blues"
     )
+    fig1.update_xaxes(matches=None, title_text="")
+    fig1.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
     fig1.update_layout(yaxis_title="Claim Rate (%)")
-    fig1.write_html("outputs/visualizations/interactive/claims_by_driving_experience.html")
-    logging.info("Saved interactive chart: claims_by_driving_experience.html")
-
-    # --- Interactive: Claims by Vehicle Year ---
-    df_grouped_year = (
-        df.groupby("vehicle_year", as_index=False)["claim_status_num"]
-        .mean().sort_values("vehicle_year")
-    )
-    df_grouped_year["claim_status_num"] *= 100
-    fig2 = px.bar(
-        df_grouped_year, x="vehicle_year", y="claim_status_num",
-        title="Claims by Vehicle Year (%)",
-        text_auto=".2f", color="claim_status_num", color_continuous_scale="Purples"
-    )
-    fig2.update_layout(yaxis_title="Claim Rate (%)")
-    fig2.write_html("outputs/visualizations/interactive/claims_by_vehicle_year.html")
-    logging.info("Saved interactive chart: claims_by_vehicle_year.html")
-
-    # --- Interactive: Claims by Vehicle Ownership (NEW) ---
-    df_grouped_owner = (
-        df.groupby("vehicle_ownership", as_index=False)["claim_status_num"]
-        .mean().sort_values("vehicle_ownership")
-    )
-    df_grouped_owner["claim_status_num"] *= 100
-    fig3 = px.bar(
-        df_grouped_owner, x="vehicle_ownership", y="claim_status_num",
-        title="Claims by Vehicle Ownership (%)",
-        text_auto=".2f", color="claim_status_num", color_continuous_scale="Greens"
-    )
-    fig3.update_layout(yaxis_title="Claim Rate (%)")
-    fig3.write_html("outputs/visualizations/interactive/claims_by_vehicle_ownership.html")
-    logging.info("Saved interactive chart: claims_by_vehicle_ownership.html")
+    fig1.write_html("outputs/visualizations/interactive/claims_by_segment.html")
+    logging.info("Saved interactive chart: claims_by_segment.html")
 
     # --- Interactive: Speeding Violations vs. Claim Status ---
-    fig4 = px.box(
+    fig2 = px.box(
         df, x="claim_status", y="speeding_violations",
         title="Speeding Violations by Claim Status",
         color="claim_status"
     )
-    fig4.write_html("outputs/visualizations/interactive/speeding_vs_claim_status.html")
+    fig2.write_html("outputs/visualizations/interactive/speeding_vs_claim_status.html")
     logging.info("Saved interactive chart: speeding_vs_claim_status.html")
 
     print("✅ Interactive visualizations generated and saved.")
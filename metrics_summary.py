@@ -8,7 +8,10 @@ This script:
 - Logs all outputs for traceability
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import os
 import logging
 
@@ -30,119 +33,181 @@ logging.info("===== STEP 2: DATA SUMMARY STARTED =====")
 # 2. LOAD CLEANED DATA
 # ======================================================
 try:
-    df = pd.read_csv("cleaned_data.csv")
+    df = pd.read_csv("cleaned_data.csv", engine="pyarrow")
     logging.info("Cleaned dataset loaded successfully.")
     print(f"✅ Cleaned dataset loaded successfully. Shape: {df.shape}")
 except Exception as e:
-    logging.error(f"Error loading cleaned data: {e}")
+    logging.error("Error loading cleaned data: %s", e)
     print(f"❌ Error loading cleaned data: {e}")
     raise SystemExit
 
 
 # ======================================================
-# 3. STANDARD METRICS
+# PREPARE: CLAIM INDICATOR AND KEY COLUMNS
 # ======================================================
-try:
-    # --- Handle claim_status as either text ("claim"/"no claim") or numeric (1/0)
-    if df["claim_status"].dtype == "object":
-        total_claims = (df["claim_status"].str.lower() == "claim").sum()
-        claim_rate = (df["claim_status"].str.lower() == "claim").mean() * 100
-    else:
-        total_claims = df["claim_status"].sum()
-        claim_rate = df["claim_status"].mean() * 100
-
-    total_customers = len(df)
-    avg_credit_score = df["credit_score"].mean()
-    avg_mileage = df["annual_mileage"].mean()
-
-    # --- Breakdown metrics
-    claims_by_age = (
-        df.groupby("age")["claim_status"]
-        .apply(lambda x: (x.str.lower() == "claim").mean() * 100 if x.dtype == "object" else x.mean() * 100)
-        .sort_index()
+# --- Handle claim_status as either text ("claim"/"no claim") or numeric (1/0).
+# The claim indicator is derived once so both metric blocks below reduce
+# the same uint8 column instead of re-scanning the strings per breakdown.
+if df["claim_status"].dtype == "object":
+    df["_is_claim"] = (
+        df["claim_status"].str.lower()
+        .map({"claim": 1, "no claim": 0})
+        .fillna(0)
+        .astype(np.uint8)
     )
-    claims_by_gender = (
-        df.groupby("gender")["claim_status"]
-        .apply(lambda x: (x.str.lower() == "claim").mean() * 100 if x.dtype == "object" else x.mean() * 100)
-        .sort_index()
+else:
+    df["_is_claim"] = df["claim_status"].eq(1).astype(np.uint8)
+
+# --- Low-cardinality keys as ordered categoricals with sorted categories, so
+# the code order is already the output order and no breakdown needs sorting
+for col in ("age", "gender", "vehicle_ownership", "driving_experience", "vehicle_year", "claim_status"):
+    df[col] = pd.Categorical(df[col], categories=sorted(df[col].dropna().unique()), ordered=True)
+
+
+# ======================================================
+# HELPERS: GROUPED MEANS OVER CATEGORY CODES
+# ======================================================
+def group_mean(df, col, values, name):
+    # Two np.bincount passes over the category codes (row counts and value
+    # sums) give every group's mean at once; missing keys (code -1) are skipped
+    # and unobserved categories dropped, matching groupby(observed=True). Rows
+    # come out in category order, i.e. already sorted.
+    codes = df[col].cat.codes.to_numpy()
+    values = np.asarray(values, dtype=np.float64)
+    valid = codes >= 0
+    if not valid.all():
+        codes, values = codes[valid], values[valid]
+    categories = df[col].cat.categories
+    counts = np.bincount(codes, minlength=len(categories))
+    sums = np.bincount(codes, weights=values, minlength=len(categories))
+    observed = counts > 0
+    return pd.Series(
+        sums[observed] / counts[observed],
+        index=pd.Index(categories[observed], name=col),
+        name=name,
     )
-    violations_by_claim_status = df.groupby("claim_status")["speeding_violations"].mean().sort_index()
+
+
+def claim_rate_by(df, is_claim, col):
+    return group_mean(df, col, is_claim, "claim_status") * 100
+
+
+# ======================================================
+# HELPERS: CSV OUTPUT
+# ======================================================
+# One large buffer per file: header and rows reach the OS in a single write
+# when the file closes instead of being flushed piecemeal.
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def write_breakdown(series, path):
+    # Arrow's C++ CSV writer for the rows; the header is written by hand since
+    # Arrow always quotes it. Category labels never contain commas, so quoting
+    # stays off and the files match the old to_csv output.
+    table = pa.Table.from_pandas(series.reset_index(), preserve_index=False)
+    with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(f"{series.index.name},{series.name}\n".encode("utf-8"))
+        pa_csv.write_csv(
+            table, f, pa_csv.WriteOptions(include_header=False, quoting_style="none")
+        )
+
+
+def write_summary(metrics, path):
+    # Two-column Metric/Value table built as one string and written in one call;
+    # values stay unrounded float64 until they are formatted here with %.2f
+    lines = ["Metric,Value"] + [f"{name},{value:.2f}" for name, value in metrics]
+    with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# ======================================================
+# 3. COMPUTE METRICS
+# ======================================================
+def compute_metrics(df):
+    # Pure aggregation (standard + extended); file output and error handling
+    # live in write_metrics() so only the I/O sits inside a try block.
+    is_claim = df["_is_claim"].to_numpy()
+    total_claims = is_claim.sum()
+    claim_rate = is_claim.mean() * 100
+
+    total_customers = len(df)
+
+    # --- All numeric column means in one pass over the numeric block
+    numeric_means = df[
+        ["credit_score", "annual_mileage", "speeding_violations", "duis", "past_accidents"]
+    ].mean()
 
     # --- Summary table
     summary_metrics = pd.DataFrame({
         "Metric": ["Total Customers", "Total Claims", "Claim Rate (%)", "Avg Credit Score", "Avg Annual Mileage"],
-        "Value": [total_customers, total_claims, round(claim_rate, 2),
-                  round(avg_credit_score, 2), round(avg_mileage, 2)]
+        "Value": np.array([total_customers, total_claims, claim_rate,
+                           numeric_means["credit_score"], numeric_means["annual_mileage"]], dtype=np.float64)
     })
 
-    # --- Save outputs
-    summary_metrics.to_csv("outputs/metrics/summary_metrics.csv", index=False)
-    claims_by_age.to_csv("outputs/metrics/claims_by_age.csv", header=True)
-    claims_by_gender.to_csv("outputs/metrics/claims_by_gender.csv", header=True)
-    violations_by_claim_status.to_csv("outputs/metrics/violations_by_claim_status.csv", header=True)
+    # --- Breakdown metrics, keyed by output file name
+    breakdowns = {
+        "claims_by_age": claim_rate_by(df, is_claim, "age"),
+        "claims_by_gender": claim_rate_by(df, is_claim, "gender"),
+        "violations_by_claim_status": group_mean(
+            df, "claim_status", df["speeding_violations"].to_numpy(), "speeding_violations"
+        ),
+        # Extended: vehicle ownership (leased / owned), driving experience, vehicle year
+        "claims_by_vehicle_ownership": claim_rate_by(df, is_claim, "vehicle_ownership"),
+        "claims_by_driving_experience": claim_rate_by(df, is_claim, "driving_experience"),
+        "claims_by_vehicle_year": claim_rate_by(df, is_claim, "vehicle_year"),
+    }
 
-    logging.info("Standard summary metrics generated successfully.")
-    logging.info(f"\n{summary_metrics}")
-    print("\n✅ Standard metrics calculated successfully.")
+    # --- Risk behavior averages
+    risk_averages = {
+        "Avg Speeding Violations": numeric_means["speeding_violations"],
+        "Avg DUIs": numeric_means["duis"],
+        "Avg Past Accidents": numeric_means["past_accidents"],
+    }
 
-except Exception as e:
-    logging.error(f"Error during summary generation: {e}")
-    print(f"❌ Error during summary generation: {e}")
-    raise
+    return {"summary": summary_metrics, "breakdowns": breakdowns, "risk_averages": risk_averages}
+
+
+metrics = compute_metrics(df)
+print("\n✅ Standard metrics calculated successfully.")
+print("✅ Extended metrics calculated successfully.")
 
 
 # ======================================================
-# 4. EXTENDED SUMMARIES
+# 4. SAVE METRICS
 # ======================================================
-try:
-    # --- Claims by vehicle ownership (leased / owned)
-    claims_by_vehicle_ownership = (
-        df.groupby("vehicle_ownership")["claim_status"]
-        .apply(lambda x: (x.str.lower() == "claim").mean() * 100 if x.dtype == "object" else x.mean() * 100)
-        .sort_index()
-    )
-    claims_by_vehicle_ownership.to_csv("outputs/metrics/claims_by_vehicle_ownership.csv", header=True)
+def write_metrics(metrics):
+    write_summary(metrics["summary"].itertuples(index=False), "outputs/metrics/summary_metrics.csv")
+    for name, series in metrics["breakdowns"].items():
+        write_breakdown(series, f"outputs/metrics/{name}.csv")
 
-    # --- Claims by driving experience
-    claims_by_driving_exp = (
-        df.groupby("driving_experience")["claim_status"]
-        .apply(lambda x: (x.str.lower() == "claim").mean() * 100 if x.dtype == "object" else x.mean() * 100)
-        .sort_index()
-    )
-    claims_by_driving_exp.to_csv("outputs/metrics/claims_by_driving_experience.csv", header=True)
 
-    # --- Claims by vehicle year
-    claims_by_vehicle_year = (
-        df.groupby("vehicle_year")["claim_status"]
-        .apply(lambda x: (x.str.lower() == "claim").mean() * 100 if x.dtype == "object" else x.mean() * 100)
-        .sort_index()
-    )
-    claims_by_vehicle_year.to_csv("outputs/metrics/claims_by_vehicle_year.csv", header=True)
+try:
+    write_metrics(metrics)
+    print("📁 Saved detailed breakdowns under 'outputs/metrics/'.")
+except OSError as e:
+    logging.error("Error saving summary metrics: %s", e)
+    print(f"❌ Error saving summary metrics: {e}")
+    raise
 
-    # --- Risk behavior averages
-    avg_speeding = df["speeding_violations"].mean()
-    avg_duis = df["duis"].mean()
-    avg_past_accidents = df["past_accidents"].mean()
 
+# ======================================================
+# 5. LOG SUMMARIES
+# ======================================================
+logging.info("Standard summary metrics generated successfully.")
+# Rendering tables is only worth doing when INFO records are emitted
+if logging.getLogger().isEnabledFor(logging.INFO):
+    breakdowns = metrics["breakdowns"]
+    logging.info("\n%s", metrics["summary"].to_string(float_format="%.2f"))
     logging.info("===== EXTENDED METRICS =====")
-    logging.info(f"Claims by Vehicle Ownership:\n{claims_by_vehicle_ownership.to_string()}")
-    logging.info(f"Claims by Driving Experience:\n{claims_by_driving_exp.to_string()}")
-    logging.info(f"Claims by Vehicle Year:\n{claims_by_vehicle_year.to_string()}")
-    logging.info(f"Avg Speeding Violations: {avg_speeding:.2f}")
-    logging.info(f"Avg DUIs: {avg_duis:.2f}")
-    logging.info(f"Avg Past Accidents: {avg_past_accidents:.2f}")
-
-    print("\n✅ Extended metrics calculated successfully.")
-    print("📁 Saved detailed breakdowns under 'outputs/metrics/'.")
-
-except Exception as e:
-    logging.error(f"Error generating extended summaries: {e}")
-    print(f"❌ Error generating extended summaries: {e}")
-    raise
+    logging.info("Claims by Vehicle Ownership:\n%s", breakdowns["claims_by_vehicle_ownership"].to_string())
+    logging.info("Claims by Driving Experience:\n%s", breakdowns["claims_by_driving_experience"].to_string())
+    logging.info("Claims by Vehicle Year:\n%s", breakdowns["claims_by_vehicle_year"].to_string())
+    for label, value in metrics["risk_averages"].items():
+        logging.info("%s: %.2f", label, value)
 
 
 # ======================================================
-# 5. COMPLETION MESSAGE
+# 6. COMPLETION MESSAGE
 # ======================================================
 logging.info("===== STEP 2: DATA SUMMARY COMPLETED SUCCESSFULLY =====")
 print("\n🎯 All summaries and logs generated successfully!")